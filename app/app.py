@@ -1,13 +1,18 @@
 from flask import Flask, request, jsonify, send_file, render_template
+from werkzeug.exceptions import HTTPException
 import os
 import threading
 import logging
-from app.utils import process_csv, handle_file_upload, get_result
+from app.utils import process_csv, handle_file_upload, get_result, get_task_status
 
 # Initialize Flask application
 app = Flask(__name__, template_folder='../templates')
 # Configure the folder for file uploads
 app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
+# Behind a reverse proxy that supports it (nginx/apache), X-Sendfile
+# lets the proxy stream result files via sendfile(2) so only headers
+# pass through Python.
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
 
 # Ensure the upload folder exists
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
@@ -48,18 +53,28 @@ def upload_file():
 def get_file_result(task_id):
     """Retrieves the processed file based on the task ID."""
     try:
+        # The in-memory Future answers "still running?" in O(1) with no
+        # filesystem stat and no race between two exists() checks.
+        status = get_task_status(task_id)
+        if status == 'running':
+            return jsonify({'status': 'Processing...'}), 202
         result = get_result(task_id, app.config['UPLOAD_FOLDER'])
         if result:
-            return send_file(result)
-        else:
-            # Check if the file is being processed
-            output_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{task_id}_output.csv")
+            # conditional=True serves range requests and lets repeat
+            # polls short-circuit on If-Modified-Since with a 304.
+            return send_file(result, conditional=True)
+        if status == 'unknown':
+            # Tasks from a previous server run are only visible on disk
             input_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{task_id}_input.csv")
-            if os.path.exists(input_file_path) and not os.path.exists(output_file_path):
+            if os.path.exists(input_file_path):
                 logging.info(f"Task {task_id} is still processing.")
                 return jsonify({'status': 'Processing...'}), 202
-            logging.info(f"Task {task_id} not found.")
-            return jsonify({'status': 'Not found'}), 404
+        logging.info(f"Task {task_id} not found.")
+        return jsonify({'status': 'Not found'}), 404
+    except HTTPException:
+        # Let conditional responses like 416 Range Not Satisfiable keep
+        # their status instead of collapsing into a 500.
+        raise
     except Exception as e:
         logging.error(f"Error retrieving result for task {task_id}: {e}")
         return jsonify({'error': f"An error occurred while retrieving the result: {e}"}), 500
@@ -1,29 +1,270 @@
-import csv 
-from collections import defaultdict
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import io
+from itertools import islice
+import mmap
 import os
+import queue
+import sys
 from uuid import uuid4
 import threading
 
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv
+except ImportError:
+    pa = None
+
 def process_csv(input_file_path, output_file_path):
-    song_data = defaultdict(lambda: defaultdict(int))
+    if pa is not None:
+        _process_csv_arrow(input_file_path, output_file_path)
+    else:
+        _process_csv_python(input_file_path, output_file_path)
+
+def _process_csv_arrow(input_file_path, output_file_path):
+    # Parse and aggregate in Arrow's C++ CSV reader: no per-row Python
+    # objects, and the group-by runs as a vectorized hash aggregate.
+    table = pa.csv.read_csv(
+        input_file_path,
+        # Date stays a plain string so values round-trip exactly as they
+        # appear in the input, like the Python path.
+        convert_options=pa.csv.ConvertOptions(
+            column_types={"Date": pa.string(), "Number of Plays": pa.int64()}
+        ),
+    )
+    result = (
+        table.group_by(["Song", "Date"])
+        .aggregate([("Number of Plays", "sum")])
+        .sort_by([("Song", "ascending"), ("Date", "ascending")])
+    )
+
+    # Arrow's own writer quotes every string field, so the result is
+    # serialized here to keep the output format identical.
+    _write_output(output_file_path, zip(
+        result.column("Song").to_pylist(),
+        result.column("Date").to_pylist(),
+        result.column("Number of Plays_sum").to_pylist(),
+    ))
+
+# Inputs below this size are not worth the chunk-splitting overhead of
+# the parallel aggregate.
+PARALLEL_SIZE_THRESHOLD = 8 * 1024 * 1024
+
+# Rows buffered per batched numeric conversion.
+NUMERIC_BATCH_SIZE = 10_000
+
+def parallel_aggregate(input_file_path, num_workers=None):
+    # Split the file into byte-range chunks aligned to row boundaries,
+    # aggregate each chunk in its own worker, then merge the per-chunk
+    # partial sums (summing is commutative, so order does not matter).
+    # Quoted fields can contain newlines, which breaks the byte-range
+    # realignment, so those inputs take the csv.reader fallback just
+    # like the single-pass path.
+    with open(input_file_path, mode='rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'"') != -1:
+                return _aggregate_with_reader(input_file_path)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    size = os.path.getsize(input_file_path)
+    step = size // num_workers
+
+    song_data = {}
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(_aggregate_range, input_file_path, i * step,
+                            size if i == num_workers - 1 else (i + 1) * step)
+            for i in range(num_workers)
+        ]
+        # Merge partials as workers finish; each partial is at most
+        # unique_keys entries, so inter-thread traffic is K keys per
+        # chunk rather than N rows.
+        for future in as_completed(futures):
+            for key, plays in future.result().items():
+                song_data[key] = song_data.get(key, 0) + plays
+    return song_data
+
+def _aggregate_range(input_file_path, start, end):
+    # Each chunk owns the rows that start inside [start, end); the row
+    # straddling the chunk end is completed here, and the next chunk
+    # skips its leading partial row accordingly.
+    local = {}
+    with open(input_file_path, mode='rb') as f:
+        # Workers share the same read-only mapping of the file's pages,
+        # so slicing the chunk is copy-free until decode.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if start == 0:
+                data_start = mm.find(b'\n') + 1  # Skip header
+                if data_start == 0:
+                    return local
+            elif mm[start - 1:start] == b'\n':
+                data_start = start
+            else:
+                # Partial leading row, owned by the previous chunk
+                nl = mm.find(b'\n', start)
+                if nl == -1:
+                    return local
+                data_start = nl + 1
+            if data_start >= end:
+                return local
+            data_end = end
+            if mm[data_end - 1:data_end] != b'\n':
+                # Complete the row straddling the chunk end
+                nl = mm.find(b'\n', data_end)
+                data_end = mm.size() if nl == -1 else nl + 1
+            data = mm[data_start:data_end]
+    reader = csv.reader(io.StringIO(data.decode()))
+    while True:
+        batch = list(islice(reader, NUMERIC_BATCH_SIZE))
+        if not batch:
+            break
+        # numpy parses the whole plays column in one C loop instead of
+        # calling int() per row.
+        plays = np.array([row[2] for row in batch], dtype=np.int64)
+        # Sort the batch by key and sum each run of equal keys with one
+        # reduceat call, so only the unique keys per batch touch the
+        # Python dict instead of every row. The joined strings are only
+        # used for ordering and run detection; numpy's U dtype strips
+        # trailing NULs, so the fields are read back from the batch
+        # rather than split out of the joined key.
+        keys = np.array([row[0] + '\x00' + row[1] for row in batch])
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sums = np.add.reduceat(plays[order], starts)
+        for row_idx, total in zip(order[starts].tolist(), sums.tolist()):
+            row = batch[row_idx]
+            key = (sys.intern(row[0]), sys.intern(row[1]))
+            local[key] = local.get(key, 0) + total
+    return local
 
+def _aggregate_with_reader(input_file_path):
+    # General-purpose fallback for inputs that use csv quoting.
+    song_data = {}
     with open(input_file_path, mode='r', newline='') as input_file:
         csv_reader = csv.reader(input_file)
         header = next(csv_reader)  # Skip header
         for row in csv_reader:
-            song, date, plays = row[0], row[1], int(row[2])
-            song_data[song][date] += plays
+            key = (sys.intern(row[0]), sys.intern(row[1]))
+            song_data[key] = song_data.get(key, 0) + int(row[2])
+    return song_data
 
-    sorted_data = sorted(
-        ((song, date, plays) for song, dates in song_data.items() for date, plays in dates.items()),
-        key=lambda x: (x[0], x[1])
-    )
+def _parse_rows(mm, start, end):
+    # Specialized for the known song,date,plays layout with no quoting:
+    # one newline find plus two bounded comma finds per row, skipping
+    # csv.reader's quoting/escape state machine and the per-row field
+    # list it allocates. Yields the three fields as bytes slices.
+    pos = start
+    while pos < end:
+        nl = mm.find(b'\n', pos)
+        if nl == -1:
+            nl = end
+        c1 = mm.find(b',', pos, nl)
+        c2 = mm.find(b',', c1 + 1, nl)
+        if c1 == -1 or c2 == -1:
+            raise ValueError(f"malformed csv row at byte {pos}")
+        plays = mm[c2 + 1:nl]
+        if plays.endswith(b'\r'):
+            plays = plays[:-1]
+        yield mm[pos:c1], mm[c1 + 1:c2], plays
+        pos = nl + 1
+
+def _aggregate_single_pass(input_file_path):
+    # mmap the input and parse rows straight off the OS page cache with
+    # the specialized splitter. Quoted fields cannot be split byte-wise,
+    # so those inputs take the csv.reader fallback.
+    song_data = {}
+    with open(input_file_path, mode='rb') as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'"') != -1:
+                return _aggregate_with_reader(input_file_path)
+            end = mm.size()
+            pos = mm.find(b'\n') + 1  # Skip header
+            if pos == 0:
+                pos = end
+            for song, date, plays in _parse_rows(mm, pos, end):
+                # Songs and dates repeat constantly, so interning collapses
+                # the N copies to one object each and lets dict lookups
+                # short-circuit on pointer equality.
+                key = (sys.intern(song.decode()), sys.intern(date.decode()))
+                song_data[key] = song_data.get(key, 0) + int(plays)
+    return song_data
+
+# Above this many unique keys numpy's lexsort beats Python's tuple sort.
+LEXSORT_THRESHOLD = 1024
+
+def _sorted_rows(song_data):
+    items = list(song_data.items())
+    if len(items) >= LEXSORT_THRESHOLD:
+        # np.lexsort over fixed-width string arrays compares in C; the
+        # last array passed is the primary sort key.
+        songs = np.array([key[0] for key, _ in items])
+        dates = np.array([key[1] for key, _ in items])
+        order = np.lexsort((dates, songs))
+        return [(items[i][0][0], items[i][0][1], items[i][1]) for i in order]
+    # Tuple keys sort lexicographically, so no key function is needed.
+    return [(song, date, plays) for (song, date), plays in sorted(items)]
+
+def _process_csv_python(input_file_path, output_file_path):
+    if os.path.getsize(input_file_path) >= PARALLEL_SIZE_THRESHOLD:
+        song_data = parallel_aggregate(input_file_path)
+    else:
+        song_data = _aggregate_single_pass(input_file_path)
+
+    _write_output(output_file_path, _sorted_rows(song_data))
+
+# Size at which the coalescing output buffer is flushed to disk.
+OUTPUT_FLUSH_THRESHOLD = 1 << 20  # 1 MiB
+
+# Write buffers checked out by _write_output and returned when done, so
+# concurrent requests reuse a few warm buffers instead of allocating a
+# fresh ~1 MiB bytearray each. Buffers are pre-sized and never cleared
+# (clearing a bytearray releases its storage); callers track their own
+# fill position and overwrite stale contents on reuse.
+_BUF_POOL = queue.LifoQueue()
+
+def _get_buf():
+    try:
+        return _BUF_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(OUTPUT_FLUSH_THRESHOLD)
+
+def _put_buf(buf):
+    _BUF_POOL.put(buf)
+
+def _escape_field(field):
+    # Matches csv.writer's minimal quoting for the rare field that
+    # actually needs it; the common case is a single containment check.
+    if ',' in field or '"' in field or '\n' in field or '\r' in field:
+        return '"' + field.replace('"', '""') + '"'
+    return field
 
-    with open(output_file_path, mode='w', newline='') as output_file:
-        csv_writer = csv.writer(output_file)
-        csv_writer.writerow(["Song", "Date", "Total Number of Plays for Date"])
-        for song, date, total_plays in sorted_data:
-            csv_writer.writerow([song, date, total_plays])
+def _write_output(output_file_path, rows):
+    # Format rows into a pooled, pre-sized bytearray and flush it as it
+    # fills, collapsing the per-row write and csv.writer call overhead
+    # into ~1 MiB writes. The fill position is tracked by hand so the
+    # buffer's allocation survives between requests.
+    buf = _get_buf()
+    size = len(buf)
+    filled = 0
+    try:
+        with open(output_file_path, mode='wb') as output_file:
+            header = b"Song,Date,Total Number of Plays for Date\n"
+            buf[:len(header)] = header
+            filled = len(header)
+            for song, date, total_plays in rows:
+                line = f"{_escape_field(song)},{_escape_field(date)},{total_plays}\n".encode()
+                if filled + len(line) > size:
+                    output_file.write(memoryview(buf)[:filled])
+                    filled = 0
+                buf[filled:filled + len(line)] = line
+                filled += len(line)
+            if filled:
+                output_file.write(memoryview(buf)[:filled])
+    finally:
+        _put_buf(buf)
 
 def handle_file_upload(input_file):
     task_id = str(uuid4())
@@ -58,4 +299,4 @@ if __name__ == "__main__":
             break
         else:
             print("Processing...")
-            time.sleep(1)
\ No newline at end of file
+            time.sleep(1)